@@ -16,13 +16,14 @@ from network.network_handler import NetworkHandler
 from camera_window import CameraWindow
 import numpy as np
 from pathlib import Path
-from queue import Queue
+from collections import deque
 from moderngl_window.geometry import quad_fs
 import math
 
 
 def normalize(v):
-    return v / np.linalg.norm(v)
+    # scalar math: for a 3-vector, np.linalg.norm is all dispatch overhead
+    return v * (1.0 / math.sqrt(v[0] * v[0] + v[1] * v[1] + v[2] * v[2]))
 
 class GameClient(CameraWindow):
     title = "Game Client"
@@ -36,6 +37,7 @@ class GameClient(CameraWindow):
 
     num_chunks = 1
     chunk_size = 128
+    brick_size = 8
 
     samples = 1
 
@@ -48,35 +50,71 @@ class GameClient(CameraWindow):
         # self.network_handler = NetworkHandler("162.19.137.231", 15000)
         # self.network_handler.set_chunk_update_callback(self.update_chunk)
         # self.network_handler.start()
-        # # network event queue
-        # self.network_queue = Queue(-1)
+        # network event queue; deque append/popleft are atomic under the GIL,
+        # so the single-producer/single-consumer handoff needs no lock
+        self.network_queue = deque()
 
 
-        # Prepare voxel data
-        self.data = np.zeros((self.chunk_size, self.chunk_size, self.chunk_size), dtype=np.int32)
+        # Prepare voxel data; block IDs fit in a byte, and the shader unpacks
+        # four voxels per uint, so the grid is 2 MiB instead of 8 MiB
+        self.data = np.zeros((self.chunk_size, self.chunk_size, self.chunk_size), dtype=np.uint8)
         # Populate the voxel data (e.g., create a cube in the center)
         self.data[4:12, 4:12, 4:12] = 1
         # create a floor
         self.data[:, 0, :] = 1
 
         # fill some random blocks
-        for i in range(1000):
-            x, y, z = np.random.randint(0, self.chunk_size, 3)
-            self.data[x, y, z] = 1
-
-        # Create the voxel buffer and upload the data
-        self.block_data_buffer = self.ctx.buffer(self.data.astype('int32').tobytes())
+        rng = np.random.default_rng()
+        coords = rng.integers(0, self.chunk_size, size=(1000, 3), dtype=np.intp)
+        self.data[coords[:, 0], coords[:, 1], coords[:, 2]] = 1
+
+        # Allocate the voxel pool GPU-side with reserve= (no host-side zero fill)
+        # and write chunks into their ranges; chunk 0 is uploaded here.
+        chunk_bytes = self.chunk_size ** 3 * self.data.itemsize
+        self.block_data_buffer = self.ctx.buffer(reserve=self.num_chunks * chunk_bytes)
+        self.block_data_buffer.write(self.data)
+
+        # Coarse occupancy map: one flag per 8^3 brick so the raymarcher can
+        # reject empty bricks without sampling the dense grid
+        bricks = self.chunk_size // self.brick_size
+        self.brick_occupancy = (
+            self.data
+            .reshape(bricks, self.brick_size, bricks, self.brick_size, bricks, self.brick_size)
+            .any(axis=(1, 3, 5))
+            .astype(np.int32)
+        )
+        self.brick_occupancy_buffer = self.ctx.buffer(self.brick_occupancy)
 
         # Load shaders
         self.compute_shader = self.load_compute_shader("raymarch.glsl")
         self.quad_shader = self.load_program("quad.glsl")
 
+        # Preallocated scratch for per-frame camera uniform data, written
+        # in place instead of building a fresh tuple every frame
+        self._cam_pos = np.zeros(3, dtype=np.float32)
+        # last uploaded camera state, used to skip redundant uniform writes
+        self._cam_state = None
+
         # Create a framebuffer with color and depth attachments
         self.raymarch_resolution = (1280, 720) 
         # self.raymarch_resolution = (1280 * 2, 720 * 2) 
         self.color_texture = self.ctx.texture(self.raymarch_resolution, 4, dtype="f4")
         self.depth_texture = self.ctx.depth_texture(self.raymarch_resolution)
 
+        # Cache uniform handles and dispatch sizes; constant uniforms are
+        # written once here rather than every frame
+        self._u_view = self.compute_shader["u_view"]
+        self._u_proj = self.compute_shader["u_proj"]
+        self._u_camera_pos = self.compute_shader["u_cameraPos"]
+        self.compute_shader["u_voxelGridDim"].value = (self.chunk_size,) * 3
+        self.compute_shader["u_screenSize"].value = self.raymarch_resolution
+        self._group_x = (self.raymarch_resolution[0] + 15) // 16
+        self._group_y = (self.raymarch_resolution[1] + 15) // 16
+
+        # the projection only changes with the aspect ratio, so upload it
+        # here and on resize instead of every frame
+        self._u_proj.write(self.camera.projection.matrix)
+
         # Create a screen-aligned quad
         self.quad = quad_fs()
 
@@ -85,9 +123,49 @@ class GameClient(CameraWindow):
 
     def update_chunk(self, chunk_pos, chunk_data):
         """Callback to update a chunk"""
-        self.network_queue.put((chunk_pos, chunk_data))
+        self.network_queue.append((chunk_pos, chunk_data))
+
+    def _drain_network_queue(self):
+        """Apply all chunk updates queued by the network thread."""
+        while True:
+            try:
+                chunk_pos, chunk_data = self.network_queue.popleft()
+            except IndexError:
+                break
+            self._apply_chunk(chunk_pos, chunk_data)
+
+    def _apply_chunk(self, chunk_pos, chunk_data):
+        """Write a received 16^3 chunk into the voxel grid and upload only
+        the affected region instead of re-uploading the whole buffer."""
+        n = 16
+        x0, y0, z0 = (c * n for c in chunk_pos)
+        self.data[x0:x0 + n, y0:y0 + n, z0:z0 + n] = chunk_data.reshape(n, n, n)
+
+        # refresh occupancy for the bricks the chunk overlaps
+        bs = self.brick_size
+        nb = n // bs
+        bx = x0 // bs
+        self.brick_occupancy[bx:bx + nb, y0 // bs:y0 // bs + nb, z0 // bs:z0 // bs + nb] = (
+            self.data[x0:x0 + n, y0:y0 + n, z0:z0 + n]
+            .reshape(nb, bs, nb, bs, nb, bs)
+            .any(axis=(1, 3, 5))
+        )
+
+        # leading-axis slabs are contiguous, so write just the touched ranges
+        plane = self.chunk_size * self.chunk_size
+        self.block_data_buffer.write(
+            self.data[x0:x0 + n], offset=x0 * plane * self.data.itemsize
+        )
+        brick_plane = (self.chunk_size // bs) ** 2
+        self.brick_occupancy_buffer.write(
+            self.brick_occupancy[bx:bx + nb],
+            offset=bx * brick_plane * self.brick_occupancy.itemsize,
+        )
 
     def render(self, time, frame_time):
+        # apply any chunk updates that arrived since the last frame
+        self._drain_network_queue()
+
         # log camera position and pitch/yaw
         # logger.info(f"Camera Position: {self.camera.position}")
         # logger.info(f"Camera Pitch: {self.camera.pitch}, Yaw: {self.camera.yaw}")
@@ -95,28 +173,36 @@ class GameClient(CameraWindow):
         # Bind the framebuffer
         self.ctx.clear(0.0, 0.0, 0.0, 1.0)
 
-        # Bind the voxel buffer to the correct binding point
+        # Bind the voxel and brick occupancy buffers to their binding points
         self.block_data_buffer.bind_to_storage_buffer(binding=0)
+        self.brick_occupancy_buffer.bind_to_storage_buffer(binding=1)
 
         # Bind the output image
         self.color_texture.bind_to_image(0, read=False, write=True)
 
-        # Set uniforms for the compute shader
-        self.compute_shader["u_view"].write(self.camera.matrix)
-        self.compute_shader["u_proj"].write(self.camera.projection.matrix)
-        self.compute_shader["u_cameraPos"].value = tuple(self.camera.position)
-        self.compute_shader["u_voxelGridDim"].value = (self.chunk_size, self.chunk_size, self.chunk_size)
-        self.compute_shader["u_screenSize"].value = self.raymarch_resolution
+        # Update the camera uniforms only when the camera actually moved.
+        # Reading .matrix first matters: KeyboardCamera applies key-driven
+        # movement there, so the position is only current afterwards.
+        view = self.camera.matrix
+        pos = self.camera.position
+        cam_state = (pos[0], pos[1], pos[2], self.camera.yaw, self.camera.pitch)
+        if cam_state != self._cam_state:
+            self._cam_state = cam_state
+            self._u_view.write(view)
+            self._cam_pos[:] = pos
+            self._u_camera_pos.write(self._cam_pos)
 
         # Dispatch compute shader
-        group_x = (self.raymarch_resolution[0] + 15) // 16
-        group_y = (self.raymarch_resolution[1] + 15) // 16
-        self.compute_shader.run(group_x, group_y)
+        self.compute_shader.run(self._group_x, self._group_y)
 
         # Render the quad with the raymarched image
         self.color_texture.use(location=0)
         self.quad.render(self.quad_shader)
 
+    def resize(self, width, height):
+        super().resize(width, height)
+        self._u_proj.write(self.camera.projection.matrix)
+
 
 if __name__ == "__main__":
     GameClient.run()
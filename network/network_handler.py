@@ -12,6 +12,21 @@ logging.basicConfig(
 )
 
 
+# Precompiled packet formats; struct.Struct avoids re-parsing the format
+# string on every pack/unpack
+_S_PACKET_ID = struct.Struct("!B")
+_S_ENTITY_ID = struct.Struct("!I")
+_S_ADD_ENTITY = struct.Struct("!Ifffff64s")
+_S_UPDATE_ENTITY = struct.Struct("!Ifffff")
+_S_ENTITY_METADATA = struct.Struct("!I64s")
+_S_CHUNK_HEADER = struct.Struct("!iii")
+_S_MONO_CHUNK = struct.Struct("!iiib")
+_S_ENTITY_POSITION = struct.Struct("!fffff")
+_S_BLOCK_EDIT = struct.Struct("!Biii")
+_S_BULK_EDIT_HEADER = struct.Struct("!BI")
+_S_CLIENT_METADATA = struct.Struct("!B64s")
+
+
 class NetworkHandler(threading.Thread):
     """
     A class to handle network communication with a server.
@@ -32,8 +47,16 @@ class NetworkHandler(threading.Thread):
         self.host = host
         self.port = port
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # disable Nagle so small entity/block packets go out immediately,
+        # and give the kernel room to absorb chunk-streaming bursts
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
         self.entity_id = None
 
+        # reusable receive buffers, one per fixed packet size, so the
+        # steady-state receive path allocates nothing
+        self._recv_pool = {n: bytearray(n) for n in (1, 4, 13, 24, 68, 88, 4096, 4108)}
+
         # callbacks
         self.chunk_update_callback = None
 
@@ -46,47 +69,44 @@ class NetworkHandler(threading.Thread):
         logger.info("Disconnected from the server")
 
     def send_packet(self, packet_id, data):
-        self.sock.sendall(struct.pack("!B", packet_id) + data)
+        # scatter-gather send: header and payload go out in one syscall
+        # without concatenating into a new bytes object
+        header = _S_PACKET_ID.pack(packet_id)
+        sent = self.sock.sendmsg((header, data))
+        if sent < len(header) + len(data):
+            # rare partial send; flush the remainder
+            self.sock.sendall((header + bytes(data))[sent:])
 
     def receive_packet(self):
-        packet_id = struct.unpack("!B", self.recv_all(1))[0]
+        packet_id = _S_PACKET_ID.unpack(self.recv_all(1))[0]
         return packet_id
 
     def recv_all(self, length):
-        data = b""
-        while len(data) < length:
-            more_data = self.sock.recv(length - len(data))
-            if not more_data:
+        buf = self._recv_pool.get(length)
+        if buf is None:
+            buf = bytearray(length)
+        view = memoryview(buf)
+        received = 0
+        while received < length:
+            n = self.sock.recv_into(view[received:])
+            if not n:
                 raise ConnectionError("Socket connection broken")
-            data += more_data
-        return data
+            received += n
+        return buf
 
     def handle_packet(self, packet_id):
-        if packet_id == 0x00:
-            self.handle_identification()
-        elif packet_id == 0x01:
-            self.handle_add_entity()
-        elif packet_id == 0x02:
-            self.handle_remove_entity()
-        elif packet_id == 0x03:
-            self.handle_update_entity()
-        elif packet_id == 0x04:
-            self.handle_receive_chunk()
-        elif packet_id == 0x05:
-            self.handle_receive_mono_type_chunk()
-        elif packet_id == 0x06:
-            self.handle_chat()
-        elif packet_id == 0x07:
-            self.handle_update_entity_metadata()
+        handler = self._HANDLERS.get(packet_id)
+        if handler is not None:
+            handler(self)
         else:
-            logger.warning(f"Unknown packet ID: {packet_id}")
+            logger.warning("Unknown packet ID: %s", packet_id)
 
     def handle_identification(self):
         expected_length = 4
         data = self.recv_all(expected_length)
         if len(data) == expected_length:
-            self.entity_id = struct.unpack("!I", data)[0]
-            logger.info(f"Identification received, entity ID: {self.entity_id}")
+            self.entity_id = _S_ENTITY_ID.unpack(data)[0]
+            logger.info("Identification received, entity ID: %d", self.entity_id)
         else:
             logger.error("Failed to receive the complete identification packet")
 
@@ -94,10 +114,11 @@ class NetworkHandler(threading.Thread):
         expected_length = 88  # 4 bytes for entityId, 20 bytes for floats, 64 bytes for name
         data = self.recv_all(expected_length)
         if len(data) == expected_length:
-            entity_id, x, y, z, yaw, pitch, name_bytes = struct.unpack("!Ifffff64s", data)
+            entity_id, x, y, z, yaw, pitch, name_bytes = _S_ADD_ENTITY.unpack(data)
             name = name_bytes.decode('utf-8').rstrip('\x00')
             logger.info(
-                f"Add Entity: ID={entity_id}, X={x}, Y={y}, Z={z}, Yaw={yaw}, Pitch={pitch}, Name={name}"
+                "Add Entity: ID=%d, X=%s, Y=%s, Z=%s, Yaw=%s, Pitch=%s, Name=%s",
+                entity_id, x, y, z, yaw, pitch, name,
             )
         else:
             logger.error("Failed to receive the complete add entity packet")
@@ -107,7 +128,7 @@ class NetworkHandler(threading.Thread):
         data = self.recv_all(expected_length)
         if len(data) == expected_length:
             message = data.decode('utf-8').rstrip('\x00')
-            logger.info(f"Chat Message Received: {message}")
+            logger.info("Chat Message Received: %s", message)
         else:
             logger.error("Failed to receive the complete chat packet")
 
@@ -115,9 +136,9 @@ class NetworkHandler(threading.Thread):
         expected_length = 68  # 4 bytes for entityId, 64 bytes for name
         data = self.recv_all(expected_length)
         if len(data) == expected_length:
-            entity_id, name_bytes = struct.unpack("!I64s", data)
+            entity_id, name_bytes = _S_ENTITY_METADATA.unpack(data)
             name = name_bytes.decode('utf-8').rstrip('\x00')
-            logger.info(f"Update Entity Metadata: ID={entity_id}, Name={name}")
+            logger.info("Update Entity Metadata: ID=%d, Name=%s", entity_id, name)
         else:
             logger.error("Failed to receive the complete update entity metadata packet")
 
@@ -125,8 +146,8 @@ class NetworkHandler(threading.Thread):
         expected_length = 4
         data = self.recv_all(expected_length)
         if len(data) == expected_length:
-            entity_id = struct.unpack("!I", data)[0]
-            logger.info(f"Remove Entity: ID={entity_id}")
+            entity_id = _S_ENTITY_ID.unpack(data)[0]
+            logger.info("Remove Entity: ID=%d", entity_id)
         else:
             logger.error("Failed to receive the complete remove entity packet")
 
@@ -134,9 +155,10 @@ class NetworkHandler(threading.Thread):
         expected_length = 24
         data = self.recv_all(expected_length)
         if len(data) == expected_length:
-            entity_id, x, y, z, yaw, pitch = struct.unpack("!Ifffff", data)
+            entity_id, x, y, z, yaw, pitch = _S_UPDATE_ENTITY.unpack(data)
             logger.info(
-                f"Update Entity: ID={entity_id}, X={x:.2f}, Y={y:.2f}, Z={z:.2f}, Yaw={yaw:.2f}, Pitch={pitch:.2f}"
+                "Update Entity: ID=%d, X=%.2f, Y=%.2f, Z=%.2f, Yaw=%.2f, Pitch=%.2f",
+                entity_id, x, y, z, yaw, pitch,
             )
         else:
             logger.error("Failed to receive the complete update entity packet")
@@ -162,11 +184,14 @@ class NetworkHandler(threading.Thread):
         expected_length = 4108  # 3 ints + 4096 bytes = 12 + 4096 = 4108 bytes
         data = self.recv_all(expected_length)
         if len(data) == expected_length:
-            x, y, z, block_data = struct.unpack("!iii4096s", data)
-            logger.info(f"Received Chunk: X={x}, Y={y}, Z={z}")
+            x, y, z = _S_CHUNK_HEADER.unpack_from(data, 0)
+            logger.info("Received Chunk: X=%d, Y=%d, Z=%d", x, y, z)
             if self.chunk_update_callback is not None:
+                # the receive buffer is pooled and will be overwritten by the
+                # next packet, so the callback gets its own copy of the payload
                 self.chunk_update_callback(
-                    (x, y, z), np.frombuffer(block_data, dtype=np.uint8)
+                    (x, y, z),
+                    np.frombuffer(data, dtype=np.uint8, count=4096, offset=12).copy(),
                 )
         else:
             logger.error("Failed to receive the complete chunk packet")
@@ -191,36 +216,40 @@ class NetworkHandler(threading.Thread):
         expected_length = 13  # 3 ints + 1 byte = 12 + 1 = 13 bytes
         data = self.recv_all(expected_length)
         if len(data) == expected_length:
-            x, y, z, block_type = struct.unpack("!iiib", data)
+            x, y, z, block_type = _S_MONO_CHUNK.unpack(data)
             logger.info(
-                f"Received Mono Type Chunk: X={x}, Y={y}, Z={z}, BlockType={block_type}"
+                "Received Mono Type Chunk: X=%d, Y=%d, Z=%d, BlockType=%d", x, y, z, block_type
             )
         else:
             logger.error("Failed to receive the complete mono type chunk packet")
 
     def send_update_entity(self, x, y, z, yaw, pitch):
         packet_id = 0x00
-        data = struct.pack("!fffff", x, y, z, yaw, pitch)
+        data = _S_ENTITY_POSITION.pack(x, y, z, yaw, pitch)
         self.send_packet(packet_id, data)
         logger.info(
-            f"Sent Update Entity: X={x}, Y={y}, Z={z}, Yaw={yaw}, Pitch={pitch}"
+            "Sent Update Entity: X=%s, Y=%s, Z=%s, Yaw=%s, Pitch=%s", x, y, z, yaw, pitch
         )
 
     def send_update_block(self, block_type, x, y, z):
         packet_id = 0x01
-        data = struct.pack("!Biii", block_type, x, y, z)
+        data = _S_BLOCK_EDIT.pack(block_type, x, y, z)
         self.send_packet(packet_id, data)
-        logger.info(f"Sent Update Block: BlockType={block_type}, X={x}, Y={y}, Z={z}")
+        logger.info("Sent Update Block: BlockType=%d, X=%d, Y=%d, Z=%d", block_type, x, y, z)
 
     def send_block_bulk_edit(self, blocks):
         packet_id = 0x02
         block_count = len(blocks)
-        data = struct.pack("!I", block_count)
-        for block in blocks:
-            block_type, x, y, z = block
-            data += struct.pack("!Biii", block_type, x, y, z)
-        self.send_packet(packet_id, data)
-        logger.info(f"Sent Block Bulk Edit: BlockCount={block_count}")
+        # pack the whole packet into one preallocated buffer instead of
+        # growing a bytes object per block
+        buf = bytearray(_S_BULK_EDIT_HEADER.size + _S_BLOCK_EDIT.size * block_count)
+        _S_BULK_EDIT_HEADER.pack_into(buf, 0, packet_id, block_count)
+        offset = _S_BULK_EDIT_HEADER.size
+        for block_type, x, y, z in blocks:
+            _S_BLOCK_EDIT.pack_into(buf, offset, block_type, x, y, z)
+            offset += _S_BLOCK_EDIT.size
+        self.sock.sendall(buf)
+        logger.info("Sent Block Bulk Edit: BlockCount=%d", block_count)
 
     def send_chat(self, message):
         packet_id = 0x03
@@ -228,15 +257,27 @@ class NetworkHandler(threading.Thread):
         message_bytes = message_bytes.ljust(4096, b'\x00')
         data = message_bytes[:4096]
         self.send_packet(packet_id, data)
-        logger.info(f"Sent Chat Message: {message}")
+        logger.info("Sent Chat Message: %s", message)
 
     def send_client_metadata(self, render_distance, name):
         packet_id = 0x04
         name_bytes = name.encode('utf-8')
         name_bytes = name_bytes.ljust(64, b'\x00')
-        data = struct.pack("!B64s", render_distance, name_bytes)
+        data = _S_CLIENT_METADATA.pack(render_distance, name_bytes)
         self.send_packet(packet_id, data)
-        logger.info(f"Sent Client Metadata: RenderDistance={render_distance}, Name={name}")
+        logger.info("Sent Client Metadata: RenderDistance=%d, Name=%s", render_distance, name)
+
+    # packet ID -> handler lookup table, built once at class creation
+    _HANDLERS = {
+        0x00: handle_identification,
+        0x01: handle_add_entity,
+        0x02: handle_remove_entity,
+        0x03: handle_update_entity,
+        0x04: handle_receive_chunk,
+        0x05: handle_receive_mono_type_chunk,
+        0x06: handle_chat,
+        0x07: handle_update_entity_metadata,
+    }
 
     # callbacks
     def set_chunk_update_callback(self, ufunc):
@@ -244,10 +285,19 @@ class NetworkHandler(threading.Thread):
 
     def run(self):
         self.connect()
+        # the receive loop is pure Python, so hoist the per-packet attribute
+        # and global lookups out of the loop and dispatch inline
+        recv_all = self.recv_all
+        handlers = self._HANDLERS
+        unpack_id = _S_PACKET_ID.unpack
         try:
             while self.running:
-                packet_id = self.receive_packet()
-                self.handle_packet(packet_id)
+                packet_id = unpack_id(recv_all(1))[0]
+                handler = handlers.get(packet_id)
+                if handler is not None:
+                    handler(self)
+                else:
+                    logger.warning("Unknown packet ID: %s", packet_id)
         except KeyboardInterrupt:
             logger.info("Interrupted by user")
         finally:
@@ -5,9 +5,14 @@ const int MAX_RAY_STEPS = 256;
 
 layout(local_size_x = 16, local_size_y = 16) in;
 
-// Input voxel data buffer
+// Input voxel data buffer, four uint8 block IDs packed per uint
 layout(std430, binding = 0) buffer VoxelBuffer {
-    int voxels[];  // 1D buffer storing voxel data
+    uint voxels[];
+};
+
+// Coarse occupancy map, one flag per 8x8x8 brick
+layout(std430, binding = 1) buffer BrickBuffer {
+    int bricks[];
 };
 
 // Output image
@@ -25,12 +30,26 @@ int getVoxelIndex(ivec3 pos) {
     return pos.x + u_voxelGridDim.x * (pos.y + u_voxelGridDim.y * pos.z);
 }
 
+// Utility function to calculate the 1D index of the 8^3 brick containing pos
+int getBrickIndex(ivec3 pos) {
+    ivec3 brickPos = pos >> 3;
+    ivec3 brickDim = u_voxelGridDim >> 3;
+    return brickPos.x + brickDim.x * (brickPos.y + brickDim.y * brickPos.z);
+}
+
 // Function to check if a voxel is filled
 bool isVoxelFilled(ivec3 pos) {
     if (any(lessThan(pos, ivec3(0))) || any(greaterThanEqual(pos, u_voxelGridDim))) {
         return false;  // Out of bounds
     }
-    return voxels[getVoxelIndex(pos)] > 0;
+    // Skip the dense grid fetch entirely when the whole brick is empty
+    if (bricks[getBrickIndex(pos)] == 0) {
+        return false;
+    }
+    // Unpack the byte for this voxel from its uint word (little-endian)
+    int index = getVoxelIndex(pos);
+    uint word = voxels[index >> 2];
+    return ((word >> uint((index & 3) * 8)) & 0xFFu) > 0u;
 }
 
 vec2 rotate2d(vec2 v, float a) {